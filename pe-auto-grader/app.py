@@ -4,8 +4,15 @@
 import streamlit as st
 import datetime
 import io
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from grader import ExcelGrader
+from grader import SCORED_FILE_PREFIX, grade_file
 
 # 페이지 설정
 st.set_page_config(
@@ -46,14 +53,119 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# 채점 결과 임시 파일 보관 시간 (세션 종료 후 남은 파일은 이 시간이 지나면 삭제)
+OUTPUT_MAX_AGE_SECONDS = 6 * 60 * 60
+
+# 결과 테이블 표시 컬럼 순서
+DISPLAY_COLS = ['순번', '학생명', '객관식(25점)', '주관식(75점)', '총점(100점)']
+
+# 다운로드 파일 형식 (단일 파일: xlsx, 여러 파일: zip)
+DOWNLOAD_MIMES = {
+    'xlsx': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    'zip': "application/zip",
+}
+
+def _prepare_display(df: pd.DataFrame) -> pd.DataFrame:
+    """표시용 데이터프레임 생성 (채점 완료 시 한 번만 만들어 세션에 보관)"""
+    display_df = df.copy()
+    # 순번 컬럼 추가 (1부터 시작)
+    display_df.insert(0, '순번', np.arange(1, len(display_df) + 1))
+    if '파일명' in display_df.columns:
+        return display_df[DISPLAY_COLS[:1] + ['파일명'] + DISPLAY_COLS[1:]]
+    return display_df[DISPLAY_COLS]
+
+def _grade_files(files: list, file_names: list) -> list:
+    """파일별 채점 (여러 파일이면 프로세스 풀로 병렬 처리)"""
+    if len(files) == 1:
+        return [grade_file(files[0], file_names[0])]
+    
+    # Streamlit 서버 스레드가 떠 있는 프로세스를 fork하지 않도록 spawn 사용
+    max_workers = min(len(files), os.cpu_count() or 1)
+    mp_context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        futures = [executor.submit(grade_file, file, file_name) for file, file_name in zip(files, file_names)]
+        try:
+            return [future.result() for future in futures]
+        except Exception:
+            # 일부 파일이 실패하면 먼저 끝난 파일의 결과 임시 파일을 지우고 오류 전달
+            for future in futures:
+                future.cancel()
+            for future in futures:
+                if not future.cancelled() and future.exception() is None:
+                    _remove_file(future.result()[1])
+            raise
+
+def _unique_file_names(file_names: list) -> list:
+    """같은 이름으로 올라온 파일은 '이름 (2).xlsx' 형식으로 구분 (zip 항목이 덮어써지지 않도록)"""
+    unique_names = []
+    used_names = set()
+    for file_name in file_names:
+        stem, ext = os.path.splitext(file_name)
+        unique_name, n = file_name, 2
+        while unique_name in used_names:
+            unique_name = f"{stem} ({n}){ext}"
+            n += 1
+        used_names.add(unique_name)
+        unique_names.append(unique_name)
+    return unique_names
+
+def _zip_results(file_names: list, excel_paths: list) -> str:
+    """여러 채점 결과 파일을 zip 하나로 묶어 임시 파일로 저장하고 경로 반환"""
+    output = tempfile.NamedTemporaryFile(prefix=SCORED_FILE_PREFIX, suffix='.zip', delete=False)
+    try:
+        with output, zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zf:
+            for file_name, excel_path in zip(file_names, excel_paths):
+                zf.write(excel_path, arcname=f"채점결과_{file_name}")
+    except Exception:
+        _remove_file(output.name)
+        raise
+    finally:
+        # 개별 결과 파일은 zip에 담았거나 실패했거나 더 이상 필요 없음
+        for excel_path in excel_paths:
+            _remove_file(excel_path)
+    return output.name
+
+def _remove_file(path: str):
+    """임시 파일 삭제 (이미 없으면 무시)"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _remove_stale_outputs(max_age: float = OUTPUT_MAX_AGE_SECONDS):
+    """세션이 끝나 지워지지 않은 오래된 채점 결과 임시 파일 정리 (Cloud Run의 /tmp는 메모리를 사용)"""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(tempfile.gettempdir()):
+        if not entry.name.startswith(SCORED_FILE_PREFIX):
+            continue
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _set_download(path: str, ext: str):
+    """다운로드 파일 경로를 세션에 저장 (이전 결과 임시 파일은 삭제)"""
+    old_path = st.session_state.excel_path
+    if old_path and old_path != path:
+        _remove_file(old_path)
+    st.session_state.excel_path = path
+    st.session_state.download_ext = ext
+
 def main():
     st.title("📊 P.E 자동 채점")
     
     # 세션 상태 초기화
     if 'results_df' not in st.session_state:
         st.session_state.results_df = None
-    if 'excel_data' not in st.session_state:
-        st.session_state.excel_data = None
+    if 'display_df' not in st.session_state:
+        st.session_state.display_df = None
+    if 'excel_path' not in st.session_state:
+        # 새 세션이 시작될 때 이전 세션들이 남긴 오래된 결과 파일 정리
+        _remove_stale_outputs()
+        st.session_state.excel_path = None
+    if 'download_ext' not in st.session_state:
+        st.session_state.download_ext = 'xlsx'
         
     sheet_info_text = None
     
@@ -64,65 +176,73 @@ def main():
     with left_col:
         st.subheader("1. 파일 데이터 입력")
         
-        # 1. 파일 업로드
-        uploaded_file = st.file_uploader(
+        # 1. 파일 업로드 (여러 반 파일을 한 번에 채점 가능)
+        uploaded_files = st.file_uploader(
             "채점할 엑셀 파일 (.xlsx)",
             type=['xlsx'],
-            help="답안 시트가 포함된 엑셀 파일을 선택하세요."
+            accept_multiple_files=True,
+            help="답안 시트가 포함된 엑셀 파일을 선택하세요. 여러 파일을 함께 선택할 수 있습니다."
         )
         
-        if uploaded_file is not None:
-            # 임시 파일 저장 (매번 새로 저장)
-            temp_file_path = f"temp_{uploaded_file.name}"
-            with open(temp_file_path, "wb") as f:
-                f.write(uploaded_file.getvalue())
+        if uploaded_files:
+            file_names = _unique_file_names([uploaded_file.name for uploaded_file in uploaded_files])
             
-            # Grader 초기화
-            grader = ExcelGrader(temp_file_path)
-            
-            if grader.load_workbook():
-                sheet_name = grader.workbook.sheetnames[0]
-                row_count = grader.answer_sheet.max_row
-                # 2. 채점 실행 버튼
-                st.subheader("2. 채점 실행")
-                if st.button("🚀 채점 시작"):
-                    with st.spinner("채점 중입니다..."):
-                        try:
-                            # 분석 및 결과 생성
-                            results_df = grader.analyze_answer_sheet()
-                            excel_data = grader.generate_scored_excel()
-                            
-                            # 세션에 저장
-                            st.session_state.results_df = results_df
-                            st.session_state.excel_data = excel_data
-                            
-                        except Exception as e:
-                            st.error(f"오류 발생: {str(e)}")
-            else:
-                st.error("파일 로드 실패")
+            # 2. 채점 실행 버튼
+            st.subheader("2. 채점 실행")
+            if st.button("🚀 채점 시작"):
+                with st.spinner("채점 중입니다..."):
+                    try:
+                        _remove_stale_outputs()
+                        
+                        # 업로드된 바이트를 그대로 메모리 스트림으로 전달 (디스크 임시 파일 없음)
+                        files = [io.BytesIO(uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+                        
+                        # 분석 및 결과 생성 (파일 하나당 작업 하나)
+                        graded = _grade_files(files, file_names)
+                        
+                        # 세션에 저장 (결과 파일은 경로만 보관)
+                        if len(graded) == 1:
+                            results_df, excel_path = graded[0]
+                            _set_download(excel_path, 'xlsx')
+                        else:
+                            results_df = pd.concat(
+                                [df.assign(파일명=file_name) for file_name, (df, _) in zip(file_names, graded)],
+                                ignore_index=True
+                            )
+                            _set_download(_zip_results(file_names, [path for _, path in graded]), 'zip')
+                        st.session_state.results_df = results_df
+                        
+                        # 순번 추가 및 컬럼 순서 정리 (재실행마다 다시 계산하지 않도록 세션에 보관)
+                        st.session_state.display_df = _prepare_display(results_df)
+                        
+                    except Exception as e:
+                        st.error(f"오류 발생: {str(e)}")
 
         # 3. 다운로드 버튼 (채점 결과가 있을 때만 표시)
-        if st.session_state.excel_data is not None:
+        if st.session_state.excel_path is not None and os.path.exists(st.session_state.excel_path):
             st.subheader("3. 결과 다운로드")
             st.caption("원본 엑셀 양식을 유지하며, 채점 결과와 점수가 자동 계산되어 저장됩니다.")
             
             today_str = datetime.datetime.now().strftime("%Y.%m.%d")
-            filename = f"PE-Training-Test-{today_str}.xlsx"
+            download_ext = st.session_state.download_ext
+            filename = f"PE-Training-Test-{today_str}.{download_ext}"
             
-            st.download_button(
-                label="📥 채점 결과 다운로드",
-                data=st.session_state.excel_data.getvalue(),
-                file_name=filename,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                type="primary"
-            )
+            # 세션에는 경로만 두고 파일은 필요할 때 열어서 전달
+            with open(st.session_state.excel_path, "rb") as excel_file:
+                st.download_button(
+                    label="📥 채점 결과 다운로드",
+                    data=excel_file,
+                    file_name=filename,
+                    mime=DOWNLOAD_MIMES[download_ext],
+                    type="primary"
+                )
 
     # --- 우측 컬럼: 결과 대시보드 ---
     with right_col:
         st.subheader("📋 채점 결과")
         
         if st.session_state.results_df is not None:
-            df = st.session_state.results_df.copy()
+            df = st.session_state.results_df
             
             # 통계 계산
             total_students = len(df)
@@ -131,11 +251,8 @@ def main():
             # 상단에 통계 정보 표시
             st.info(f"👥 총 **{total_students}명** 응시  |  📈 평균 점수: **{avg_score:.1f}점**")
             
-            # 순번 컬럼 추가 (1부터 시작)
-            df.insert(0, '순번', range(1, len(df) + 1))
-            
-            # 컬럼 순서 및 이름 정리
-            display_cols = ['순번', '학생명', '객관식(25점)', '주관식(75점)', '총점(100점)']
+            # 순번 추가 및 컬럼 순서 정리는 채점 완료 시 미리 해 둠
+            display_df = st.session_state.display_df
             
             # 컬럼 설정 (공통 사용)
             column_configuration = {
@@ -144,6 +261,10 @@ def main():
                     width=20,
                     format="%d"
                 ),
+                "파일명": st.column_config.TextColumn(
+                    "파일명",
+                    width=180
+                ),
                 "학생명": st.column_config.TextColumn(
                     "학생명",
                     width=180
@@ -164,7 +285,7 @@ def main():
             
             # 데이터프레임 표시 (컬럼 설정 추가)
             st.dataframe(
-                df[display_cols],
+                display_df,
                 use_container_width=True,
                 hide_index=True,
                 height=600,
@@ -176,7 +297,7 @@ def main():
             st.info("👈 왼쪽에서 파일을 업로드하고 '채점 시작' 버튼을 눌러주세요.")
             
             # 빈 테이블 프레임 보여주기
-            empty_data = pd.DataFrame(columns=['순번', '학생명', '객관식(25점)', '주관식(75점)', '총점(100점)'])
+            empty_data = pd.DataFrame(columns=DISPLAY_COLS)
             
             # 동일한 컬럼 설정 적용
             st.dataframe(
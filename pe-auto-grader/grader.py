@@ -2,11 +2,113 @@
 엑셀 자동채점 시스템 - 채점 로직 모듈 (안전한 시트 생성 방식 적용)
 """
 import openpyxl
-from typing import Optional
-import io
+from dataclasses import dataclass
+from typing import IO, Iterator, List, Optional, Tuple, Union
+import os
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+import numpy as np
 import pandas as pd
+from openpyxl.cell import Cell
+from openpyxl.cell.cell import ERROR_CODES
+from openpyxl.styles import PatternFill
 from openpyxl.utils import get_column_letter
-from copy import copy
+from openpyxl.utils.datetime import to_excel
+from openpyxl.worksheet.formula import ArrayFormula
+
+try:
+    from numba import njit
+except ImportError:  # numba 미설치 환경에서는 순수 파이썬/NumPy로 동작
+    njit = None
+
+
+# 채점 결과 임시 파일 이름 접두어 (오래된 파일 일괄 정리 시 식별용)
+SCORED_FILE_PREFIX = 'pe-grader-'
+
+
+# 색상 허용 오차 ±30 (거리 대신 제곱 거리와 비교하므로 미리 제곱해 둠)
+_COLOR_TOLERANCE_SQ = 30 * 30
+
+
+def _identify_color_code(r: int, g: int, b: int) -> int:
+    """RGB 값으로 색상 코드 식별 (0 초록, 1 노랑, 2 빨강, -1 미인식 / 허용 오차 ±30)"""
+    dr, dg, db = r - 182, g - 215, b - 168
+    if dr * dr + dg * dg + db * db < _COLOR_TOLERANCE_SQ: return 0
+    dr, dg, db = r - 255, g - 229, b - 153
+    if dr * dr + dg * dg + db * db < _COLOR_TOLERANCE_SQ: return 1
+    dr, dg, db = r - 234, g - 153, b - 153
+    if dr * dr + dg * dg + db * db < _COLOR_TOLERANCE_SQ: return 2
+
+    # 일반적인 색상군 백업
+    if g > 200 and r < 180: return 0
+    if r > 200 and g > 200: return 1
+    if r > 200 and g < 180: return 2
+    return -1
+
+
+if njit is not None:
+    _identify_color_code = njit(cache=True)(_identify_color_code)
+    _identify_color_code(0, 0, 0)  # 임포트 시 미리 컴파일하여 첫 채점의 JIT 지연 제거
+
+
+if njit is not None:
+    @njit(nogil=True, cache=True)
+    def _score_rows(codes, n_obj, obj_table, subj_table):
+        """색상 코드 행렬 (학생 수, 문항 수)을 학생별 객관식/주관식 점수로 합산 (임시 배열 없이 한 번 순회)"""
+        n_rows, n_cols = codes.shape
+        obj_scores = np.zeros(n_rows, dtype=np.float32)
+        subj_scores = np.zeros(n_rows, dtype=np.float32)
+        for i in range(n_rows):
+            for j in range(n_obj):
+                obj_scores[i] += obj_table[codes[i, j]]
+            for j in range(n_obj, n_cols):
+                subj_scores[i] += subj_table[codes[i, j]]
+        return obj_scores, subj_scores
+
+    _score_rows(np.zeros((1, 1), dtype=np.int8), 1,
+                np.zeros(4, dtype=np.float32), np.zeros(4, dtype=np.float32))  # 미리 컴파일
+else:
+    def _score_rows(codes, n_obj, obj_table, subj_table):
+        """색상 코드 행렬 (학생 수, 문항 수)을 학생별 객관식/주관식 점수로 합산 (NumPy 인덱싱)"""
+        return obj_table[codes[:, :n_obj]].sum(axis=1), subj_table[codes[:, n_obj:]].sum(axis=1)
+
+
+# 채점결과 시트 XML 골격
+# 시트 구성이 고정되어 있으므로 셀 객체를 만들지 않고 문자열 템플릿으로 한 번에 작성
+_SHEET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<dimension ref="{dimension}"/>'
+    '<sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+    '<sheetFormatPr defaultRowHeight="15"/>'
+    '<cols><col min="{min_col}" max="{max_col}" width="{width}" customWidth="1"/></cols>'
+    '<sheetData>'
+)
+_SHEET_FOOTER = (
+    '</sheetData>'
+    '<pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/>'
+    '</worksheet>'
+)
+_ROW_TMPL = '<row r="{r}">{cells}</row>'
+_NUM_CELL = '<c r="{ref}"{style}><v>{value:.16g}</v></c>'
+_BOOL_CELL = '<c r="{ref}" t="b"><v>{value}</v></c>'
+_ERROR_CELL = '<c r="{ref}" t="e"><v>{value}</v></c>'
+_STR_CELL = '<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+_FORMULA_CELL = '<c r="{ref}"><f{attrs}>{formula}</f></c>'
+
+
+@dataclass
+class GradedRow:
+    """학생 한 명(행)의 채점 결과 - 답안 셀별 색상 이름 보관"""
+    row_idx: int                        # 엑셀 행 번호 (1-based)
+    name: object                        # 학생명 셀 값
+    obj_colors: List[Optional[str]]     # 객관식 E~N열 색상
+    subj_colors: List[Optional[str]]    # 주관식 P~AD열 색상
+    obj_score: float = 0.0              # 객관식 합계
+    subj_score: float = 0.0             # 주관식 합계
+
 
 class ExcelGrader:
     """엑셀 파일을 분석하고 채점하는 클래스"""
@@ -15,11 +117,23 @@ class ExcelGrader:
     # 초록: B6D7A8 (182, 215, 168)
     # 노랑: FFE599 (255, 229, 153)
     # 빨강: EA9999 (234, 153, 153)
+    # 기준 색상과 정확히 일치하는 ARGB는 파싱 없이 바로 식별
+    ARGB_COLORS = {'FFB6D7A8': '초록', 'FFFFE599': '노랑', 'FFEA9999': '빨강'}
+    # 채점결과 시트 배경색 (셀마다 복사하지 않고 공용 객체를 그대로 지정)
+    FILLS = {color: PatternFill(start_color=argb, end_color=argb, fill_type='solid')
+             for argb, color in ARGB_COLORS.items()}
     
     # 객관식 배점 (E~N열)
     OBJECTIVE_SCORES = {'초록': 2.5, '노랑': 1.25, '빨강': 0}
     # 주관식 배점 (P~AD열)
     SUBJECTIVE_SCORES = {'초록': 5.0, '노랑': 2.5, '빨강': 0}
+
+    # 색상 코드 (배점표 인덱스): 0 초록, 1 노랑, 2 빨강, 3 미인식
+    COLOR_NAMES = ('초록', '노랑', '빨강')
+    COLOR_CODES = {'초록': 0, '노랑': 1, '빨강': 2, None: 3}
+    # 색상 코드 -> 배점 (벡터 채점용, 배점이 1.25 단위라 float32로도 정확)
+    OBJECTIVE_SCORE_TABLE = np.array(list(map(OBJECTIVE_SCORES.get, COLOR_NAMES)) + [0], dtype=np.float32)
+    SUBJECTIVE_SCORE_TABLE = np.array(list(map(SUBJECTIVE_SCORES.get, COLOR_NAMES)) + [0], dtype=np.float32)
     
     # 열 범위 (0-based index)
     OBJECTIVE_COLS = list(range(4, 14))  # E~N열 (4~13)
@@ -28,113 +142,262 @@ class ExcelGrader:
     SUBJECTIVE_SUM_COL = 30              # AE열 (30)
     TOTAL_SUM_COL = 31                   # AF열 (31)
     
-    def __init__(self, file_path: str):
-        self.file_path = file_path
+    def __init__(self, file_or_path: Union[str, IO[bytes]]):
+        self.file_or_path = file_or_path  # 파일 경로 또는 업로드된 바이트 스트림
         self.workbook = None
         self.answer_sheet = None
+        self._color_cache = {}  # ARGB 문자열 -> 색상 이름
+        self._all_rgb = False   # 통합 문서의 모든 채우기가 RGB 패턴 채우기인지 (load_workbook에서 판별)
+        self._graded_rows: Optional[List[GradedRow]] = None  # analyze_answer_sheet 결과 (엑셀 생성 시 재사용)
         
+    def _source(self) -> Union[str, IO[bytes]]:
+        """openpyxl에 넘길 원본 반환 (스트림이면 처음 위치로 되감음)"""
+        if hasattr(self.file_or_path, 'seek'):
+            self.file_or_path.seek(0)
+        return self.file_or_path
+
     def load_workbook(self) -> bool:
-        """엑셀 파일 로드"""
+        """엑셀 파일 로드 (읽기 전용 - 시트 목록과 스타일 표만 읽고 셀은 채점 시 한 번만 스트리밍)"""
         try:
-            self.workbook = openpyxl.load_workbook(self.file_path, data_only=False)
+            self.workbook = openpyxl.load_workbook(self._source(), read_only=True, data_only=False)
             self.answer_sheet = self.workbook[self.workbook.sheetnames[0]]
+            self._all_rgb = self._uses_only_rgb_fills(self.workbook)
             return True
         except Exception as e:
             print(f"파일 로드 실패: {e}")
             return False
     
+    @staticmethod
+    def _uses_only_rgb_fills(workbook) -> bool:
+        """스타일 표의 채우기를 한 번 훑어 테마/인덱스 색상이나 그라데이션이 없는지 확인"""
+        for fill in workbook._fills:
+            if not isinstance(fill, PatternFill) or fill.fgColor.type != 'rgb':
+                return False
+        return True
+
+    def close(self):
+        """읽기 전용 워크북이 열어 둔 원본 파일 닫기"""
+        if self.workbook is not None:
+            self.workbook.close()
+
     def get_cell_color(self, cell) -> Optional[str]:
         """셀의 배경색을 추출하여 색상 이름으로 반환"""
+        return self._color_from_argb(self._get_cell_argb(cell))
+
+    def _get_cell_argb(self, cell) -> Optional[str]:
+        """셀 배경색의 ARGB 문자열 반환 (테마/인덱스 색상이면 None)"""
         fill = cell.fill
-        if not fill or not fill.start_color:
+        if not fill:
             return None
-            
-        if fill.start_color.type == 'rgb':
-            rgb = fill.start_color.rgb
-            if rgb and len(rgb) >= 6:
-                if len(rgb) == 8:
-                    rgb = rgb[2:]
-                try:
-                    r = int(rgb[0:2], 16)
-                    g = int(rgb[2:4], 16)
-                    b = int(rgb[4:6], 16)
-                    return self._identify_color(r, g, b)
-                except ValueError:
-                    return None
-        return None
+        if self._all_rgb:
+            # 테마 색상이 없는 통합 문서는 색상 형식 확인 생략
+            return fill.fgColor.rgb
+
+        # start_color 대신 fgColor 사용 (동일 객체, 8자리 ARGB 반환)
+        fg_color = getattr(fill, 'fgColor', None)
+        if not fg_color or fg_color.type != 'rgb':
+            return None
+        return fg_color.rgb
+
+    def _color_from_argb(self, rgb: str) -> Optional[str]:
+        """ARGB 문자열로 색상 식별 (같은 문자열은 한 번만 파싱)"""
+        color = self.ARGB_COLORS.get(rgb)
+        if color is not None:
+            return color
+        if rgb in self._color_cache:
+            return self._color_cache[rgb]
+
+        # 기준 색상과 다른 색조만 허용 오차 비교 (한 번의 정수 변환 후 비트 연산으로 분해)
+        color = None
+        if rgb and len(rgb) >= 6:
+            rgb_hex = rgb[2:] if len(rgb) == 8 else rgb[:6]
+            try:
+                packed = int(rgb_hex, 16)
+                color = self._identify_color(packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF)
+            except ValueError:
+                color = None
+        self._color_cache[rgb] = color
+        return color
     
     def _identify_color(self, r: int, g: int, b: int) -> Optional[str]:
         """RGB 값으로 색상 식별 (허용 오차 ±30)"""
-        def color_distance(r1, g1, b1, r2, g2, b2):
-            return ((r1-r2)**2 + (g1-g2)**2 + (b1-b2)**2) ** 0.5
-        
-        if color_distance(r, g, b, 182, 215, 168) < 30: return '초록'
-        if color_distance(r, g, b, 255, 229, 153) < 30: return '노랑'
-        if color_distance(r, g, b, 234, 153, 153) < 30: return '빨강'
-        
-        # 일반적인 색상군 백업
-        if g > 200 and r < 180: return '초록'
-        if r > 200 and g > 200: return '노랑'
-        if r > 200 and g < 180: return '빨강'
-        return None
+        code = _identify_color_code(r, g, b)
+        if code < 0:
+            return None
+        return self.COLOR_NAMES[code]
+
+    def _read_fast(self) -> Iterator[Tuple[int, object, List[Optional[str]]]]:
+        """답안 시트를 한 번 순회하며 학생 행마다 (행번호, 학생명, 답안 셀 ARGB 목록) 반환"""
+        answer_cols = self.OBJECTIVE_COLS + self.SUBJECTIVE_COLS
+        # 읽기 전용 모드로 한 번만 순회 (ws.cell() 반복 호출 없음)
+        sheet = self.answer_sheet
+        # 읽기 전용 시트는 파일의 <dimension> 태그를 그대로 믿으므로, 태그가 실제 범위와 달라도
+        # 학생 행이 빠지지 않도록 무시하고 마지막 행까지 읽음
+        sheet.reset_dimensions()
+        for row_idx, row in enumerate(sheet.iter_rows(min_row=2), start=2):
+            if len(row) <= 2: continue
+
+            student_name = row[2].value
+            if not student_name or str(student_name).strip() == '':
+                continue
+
+            argbs = [self._get_cell_argb(row[col_idx]) if col_idx < len(row) else None
+                     for col_idx in answer_cols]
+            yield row_idx, student_name, argbs
 
     def analyze_answer_sheet(self) -> pd.DataFrame:
         """UI 표시용 데이터프레임 생성"""
         if not self.answer_sheet:
             return pd.DataFrame()
 
-        results = []
-        for row in self.answer_sheet.iter_rows(min_row=2, max_row=self.answer_sheet.max_row):
-            if len(row) <= 2: continue
-            
-            student_name = row[2].value
-            if not student_name or str(student_name).strip() == '':
-                continue
-                
-            # [1] 객관식 채점
-            obj_score_sum = 0
-            for col_idx in self.OBJECTIVE_COLS:
-                if col_idx < len(row):
-                    cell = row[col_idx]
-                    color = self.get_cell_color(cell)
-                    score = self.OBJECTIVE_SCORES.get(color, 0)
-                    obj_score_sum += score
-
-            # [2] 주관식 채점
-            subj_score_sum = 0
-            for col_idx in self.SUBJECTIVE_COLS:
-                if col_idx < len(row):
-                    cell = row[col_idx]
-                    color = self.get_cell_color(cell)
-                    score = self.SUBJECTIVE_SCORES.get(color, 0)
-                    subj_score_sum += score
-            
-            results.append({
-                '행번호': row[0].row,
-                '학생명': student_name,
-                '객관식(25점)': obj_score_sum,
-                '주관식(75점)': subj_score_sum,
-                '총점(100점)': obj_score_sum + subj_score_sum
-            })
-            
-        df = pd.DataFrame(results)
-        if not df.empty:
-            df = df.sort_values('행번호').drop(columns=['행번호']).reset_index(drop=True)
+        # 최대 학생 수(데이터 행 수)만큼 배열을 미리 할당하고 인덱스로 채움
+        # (<dimension> 태그 기준이므로 실제 행이 더 많으면 아래에서 늘림)
+        n_obj = len(self.OBJECTIVE_COLS)
+        n_rows = max((self.answer_sheet.max_row or 1) - 1, 0)
+        names = np.empty(n_rows, dtype=object)
+        codes = np.empty((n_rows, n_obj + len(self.SUBJECTIVE_COLS)), dtype=np.int8)
+
+        # 색상 판별 결과는 generate_scored_excel에서 재사용하도록 보관
+        self._graded_rows = []
+        k = 0
+        for row_idx, student_name, argbs in self._read_fast():
+            if k == len(names):
+                grow = max(k, 1)
+                names = np.concatenate([names, np.empty(grow, dtype=object)])
+                codes = np.concatenate([codes, np.empty((grow, codes.shape[1]), dtype=np.int8)])
+            colors = [self._color_from_argb(argb) for argb in argbs]
+            self._graded_rows.append(GradedRow(row_idx, student_name, colors[:n_obj], colors[n_obj:]))
+            names[k] = student_name
+            codes[k] = [self.COLOR_CODES[color] for color in colors]
+            k += 1
+        if k == 0:
+            return pd.DataFrame()
+
+        # 색상 코드 행렬을 배점표로 일괄 채점 ([1] 객관식, [2] 주관식)
+        obj_scores, subj_scores = _score_rows(
+            codes[:k], n_obj, self.OBJECTIVE_SCORE_TABLE, self.SUBJECTIVE_SCORE_TABLE
+        )
+        for graded, obj_score, subj_score in zip(self._graded_rows, obj_scores.tolist(), subj_scores.tolist()):
+            graded.obj_score = obj_score
+            graded.subj_score = subj_score
+
+        # 행은 시트 순서대로 읽혔으므로 별도 정렬 없이 그대로 사용
+        df = pd.DataFrame({
+            '학생명': names[:k],
+            '객관식(25점)': obj_scores,
+            '주관식(75점)': subj_scores,
+            '총점(100점)': obj_scores + subj_scores
+        })
         return df
 
-    def generate_scored_excel(self) -> io.BytesIO:
+    def _register_fill_styles(self, sheet) -> dict:
+        """배경색 3종을 워크북 스타일 표에 한 번만 등록하고 색상 이름 -> 스타일 번호(s 속성) 반환"""
+        fill_style_ids = {}
+        for color, fill in self.FILLS.items():
+            template = Cell(sheet)
+            template.fill = fill
+            fill_style_ids[color] = template.style_id
+        return fill_style_ids
+
+    @staticmethod
+    def _cell_xml(ref: str, value, sheet) -> str:
+        """원본 셀 값 하나를 <c> 요소 문자열로 변환 (openpyxl 저장 시와 같은 형식)"""
+        if value is None or value == "":
+            return ""
+        if isinstance(value, bool):
+            return _BOOL_CELL.format(ref=ref, value=int(value))
+        if isinstance(value, (int, float)):
+            return _NUM_CELL.format(ref=ref, style="", value=value)
+        if isinstance(value, str):
+            if len(value) > 1 and value.startswith("="):
+                return _FORMULA_CELL.format(ref=ref, attrs="", formula=escape(value[1:]))
+            if value in ERROR_CODES:
+                return _ERROR_CELL.format(ref=ref, value=value)
+            return _STR_CELL.format(ref=ref, text=escape(value))
+
+        # 날짜/배열 수식 등 드문 형식은 openpyxl 셀의 형식 판별(표시 형식 등록 포함)을 그대로 사용
+        cell = Cell(sheet, value=value)
+        if cell.data_type == 'd':
+            return _NUM_CELL.format(
+                ref=ref, style=f' s="{cell.style_id}"', value=to_excel(value, sheet.parent.epoch)
+            )
+        if cell.data_type == 'f':
+            attrs = "".join(f" {key}={quoteattr(val)}" for key, val in dict(value).items())
+            formula = escape(value.text[1:]) if isinstance(value, ArrayFormula) else ""
+            return _FORMULA_CELL.format(ref=ref, attrs=attrs, formula=formula)
+        return _STR_CELL.format(ref=ref, text=escape(str(value)))
+
+    def _build_scored_sheet_xml(self, source_sheet, target_sheet, graded_by_row: dict) -> str:
+        """원본 시트 값에 점수/합계를 반영한 채점결과 시트 XML 전체를 생성"""
+        # 배경색 스타일은 미리 등록해 두고 점수 셀에는 스타일 번호만 기입
+        fill_style_ids = self._register_fill_styles(target_sheet)
+        style_attrs = {color: f' s="{style_id}"' for color, style_id in fill_style_ids.items()}
+
+        max_c = source_sheet.max_column
+        letters = [get_column_letter(c) for c in range(1, max_c + 1)]
+        rows_xml = []
+        last_row = 1
+
+        for row_idx, row_values in enumerate(source_sheet.iter_rows(values_only=True), start=1):
+            last_row = row_idx
+            cells = [
+                self._cell_xml(f"{letter}{row_idx}", value, target_sheet)
+                for letter, value in zip(letters, row_values)
+            ]
+
+            graded = graded_by_row.get(row_idx)
+            if graded is not None:
+                # [점수 기입] 객관식/주관식
+                for col_idx, color in zip(self.OBJECTIVE_COLS, graded.obj_colors):
+                    cells[col_idx] = _NUM_CELL.format(
+                        ref=f"{letters[col_idx]}{row_idx}",
+                        style=style_attrs.get(color, ""),
+                        value=self.OBJECTIVE_SCORES.get(color, 0),
+                    )
+                for col_idx, color in zip(self.SUBJECTIVE_COLS, graded.subj_colors):
+                    cells[col_idx] = _NUM_CELL.format(
+                        ref=f"{letters[col_idx]}{row_idx}",
+                        style=style_attrs.get(color, ""),
+                        value=self.SUBJECTIVE_SCORES.get(color, 0),
+                    )
+
+                # [합계 입력] 채점 시 계산된 합계를 값으로 기입 (SUM 수식 재계산 불필요)
+                for col_idx, total in (
+                    (self.OBJECTIVE_SUM_COL, graded.obj_score),
+                    (self.SUBJECTIVE_SUM_COL, graded.subj_score),
+                    (self.TOTAL_SUM_COL, graded.obj_score + graded.subj_score),
+                ):
+                    cells[col_idx] = _NUM_CELL.format(ref=f"{letters[col_idx]}{row_idx}", style="", value=total)
+
+            rows_xml.append(_ROW_TMPL.format(r=row_idx, cells="".join(cells)))
+
+        # [열 너비 설정] E열(5번째 열)부터 너비 6
+        header = _SHEET_HEADER.format(
+            dimension=f"A1:{letters[-1]}{last_row}", min_col=5, max_col=max(max_c, 5), width=6
+        )
+        return header + "".join(rows_xml) + _SHEET_FOOTER
+
+    @staticmethod
+    def _replace_sheet_part(package_path: str, part_name: str, sheet_xml: str, output: IO[bytes]):
+        """openpyxl이 저장한 xlsx 패키지에서 시트 파트 하나만 템플릿 XML로 교체하여 output에 기록
+        (나머지 파트는 메모리에 통째로 올리지 않고 스트림으로 복사)"""
+        with zipfile.ZipFile(package_path) as src, \
+                zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for item in src.infolist():
+                if item.filename == part_name:
+                    dst.writestr(item, sheet_xml)
+                    continue
+                with src.open(item) as entry, dst.open(item, 'w') as target:
+                    shutil.copyfileobj(entry, target)
+
+    def generate_scored_excel(self) -> str:
         """
         채점 결과 파일 생성 (안전한 방식)
         copy_worksheet 대신 create_sheet 사용
+        결과는 임시 파일로 저장하고 그 경로를 반환 (메모리에 파일 전체를 들고 있지 않음)
         """
-        output = io.BytesIO()
-        
-        # 워크북 안전 로드
-        temp_buffer = io.BytesIO()
-        self.workbook.save(temp_buffer)
-        temp_buffer.seek(0)
-        
-        new_wb = openpyxl.load_workbook(temp_buffer)
+        # 워크북 안전 로드 (메모리 저장 후 재파싱하지 않고 원본 파일에서 새로 로드)
+        new_wb = openpyxl.load_workbook(self._source(), data_only=False, keep_vba=False)
         
         # [중요] 엑셀 파일 손상(table1.xml 오류) 방지
         # 원본 파일에 있는 '표(Table)' 정의가 openpyxl 저장 시 충돌을 일으키므로 강제 제거
@@ -156,77 +419,58 @@ class ExcelGrader:
             
         target_sheet = new_wb.create_sheet(base_name)
         
-        # 헤더 텍스트 입력 (O, AE, AF)
-        for sheet in [source_sheet, target_sheet]:
-             sheet.cell(row=1, column=self.OBJECTIVE_SUM_COL + 1).value = "객관식"
-             sheet.cell(row=1, column=self.SUBJECTIVE_SUM_COL + 1).value = "주관식"
-             sheet.cell(row=1, column=self.TOTAL_SUM_COL + 1).value = "총합"
-
-        # 1. 원본 데이터 전체 복사 (값만 복사하여 객체 충돌 방지)
-        max_r = source_sheet.max_row
-        max_c = source_sheet.max_column
-        
-        for r in range(1, max_r + 1):
-            for c in range(1, max_c + 1):
-                source_cell = source_sheet.cell(row=r, column=c)
-                target_cell = target_sheet.cell(row=r, column=c)
-                target_cell.value = source_cell.value
-                # 필요시 스타일 복사 로직 추가 가능하지만, 
-                # 오류 방지를 위해 일단 값만 복사
-
-        # 2. 채점 및 수식 적용
-        for row_idx in range(2, max_r + 1):
-            student_name = source_sheet.cell(row=row_idx, column=3).value
-            if not student_name or str(student_name).strip() == '':
-                continue
+        # 헤더 텍스트 입력 (O, AE, AF) - 채점결과 시트에는 아래 복사로 함께 반영됨
+        source_sheet.cell(row=1, column=self.OBJECTIVE_SUM_COL + 1).value = "객관식"
+        source_sheet.cell(row=1, column=self.SUBJECTIVE_SUM_COL + 1).value = "주관식"
+        source_sheet.cell(row=1, column=self.TOTAL_SUM_COL + 1).value = "총합"
 
-            # [점수 기입]
-            # 객관식
-            for col_idx in self.OBJECTIVE_COLS:
-                source_cell = source_sheet.cell(row=row_idx, column=col_idx + 1)
-                target_cell = target_sheet.cell(row=row_idx, column=col_idx + 1)
-                
-                color = self.get_cell_color(source_cell)
-                score = self.OBJECTIVE_SCORES.get(color, 0)
-                target_cell.value = score
-                target_cell.fill = copy(source_cell.fill)  # [추가] 배경색 복사
-
-            # 주관식
-            for col_idx in self.SUBJECTIVE_COLS:
-                source_cell = source_sheet.cell(row=row_idx, column=col_idx + 1)
-                target_cell = target_sheet.cell(row=row_idx, column=col_idx + 1)
-                
-                color = self.get_cell_color(source_cell)
-                score = self.SUBJECTIVE_SCORES.get(color, 0)
-                target_cell.value = score
-                target_cell.fill = copy(source_cell.fill)  # [추가] 배경색 복사
-            
-            # [수식 입력]
-            # 컬럼 문자 가져오기
-            o_col = get_column_letter(self.OBJECTIVE_SUM_COL + 1)
-            e_col = get_column_letter(self.OBJECTIVE_COLS[0] + 1)
-            n_col = get_column_letter(self.OBJECTIVE_COLS[-1] + 1)
-            
-            ae_col = get_column_letter(self.SUBJECTIVE_SUM_COL + 1)
-            p_col = get_column_letter(self.SUBJECTIVE_COLS[0] + 1)
-            ad_col = get_column_letter(self.SUBJECTIVE_COLS[-1] + 1)
-            
-            af_col = get_column_letter(self.TOTAL_SUM_COL + 1)
-            
-            # 타겟 시트(채점결과)에 합계 수식 입력
-            target_sheet.cell(row=row_idx, column=self.OBJECTIVE_SUM_COL + 1).value = f"=SUM({e_col}{row_idx}:{n_col}{row_idx})"
-            target_sheet.cell(row=row_idx, column=self.SUBJECTIVE_SUM_COL + 1).value = f"=SUM({p_col}{row_idx}:{ad_col}{row_idx})"
-            target_sheet.cell(row=row_idx, column=self.TOTAL_SUM_COL + 1).value = f"={o_col}{row_idx}+{ae_col}{row_idx}"
+        # 채점 결과 (analyze_answer_sheet에서 판별한 색상/합계 재사용)
+        if self._graded_rows is None:
+            self.analyze_answer_sheet()
+        graded_by_row = {graded.row_idx: graded for graded in self._graded_rows}
+
+        # 채점결과 시트 본문은 템플릿으로 생성 (원본 시트에 참조 수식을 넣기 전의 값 기준)
+        sheet_xml = self._build_scored_sheet_xml(source_sheet, target_sheet, graded_by_row)
+
+        # 컬럼 문자 가져오기
+        o_col = get_column_letter(self.OBJECTIVE_SUM_COL + 1)
+        ae_col = get_column_letter(self.SUBJECTIVE_SUM_COL + 1)
+        af_col = get_column_letter(self.TOTAL_SUM_COL + 1)
 
-            # 원본 시트에 참조 수식 입력
+        # 원본 시트에 참조 수식 입력
+        for graded in self._graded_rows:
+            row_idx = graded.row_idx
             source_sheet.cell(row=row_idx, column=self.OBJECTIVE_SUM_COL + 1).value = f"='{target_sheet_name}'!{o_col}{row_idx}"
             source_sheet.cell(row=row_idx, column=self.SUBJECTIVE_SUM_COL + 1).value = f"='{target_sheet_name}'!{ae_col}{row_idx}"
             source_sheet.cell(row=row_idx, column=self.TOTAL_SUM_COL + 1).value = f"='{target_sheet_name}'!{af_col}{row_idx}"
 
-        # [열 너비 설정] 채점결과 시트 E열부터 (5번째 열)
-        for c in range(5, max_c + 1):
-             target_sheet.column_dimensions[get_column_letter(c)].width = 6
+        # openpyxl로 패키지(스타일/관계/원본 시트)를 임시 파일에 저장한 뒤 빈 채점결과 시트 파트만 교체
+        package = tempfile.NamedTemporaryFile(prefix=SCORED_FILE_PREFIX, suffix='.xlsx', delete=False)
+        output = tempfile.NamedTemporaryFile(prefix=SCORED_FILE_PREFIX, suffix='.xlsx', delete=False)
+        try:
+            with package:
+                new_wb.save(package)
+            with output:
+                self._replace_sheet_part(package.name, target_sheet.path.lstrip('/'), sheet_xml, output)
+        except Exception:
+            os.remove(output.name)
+            raise
+        finally:
+            os.remove(package.name)
+        return output.name
+
+
+def grade_file(file_or_path: Union[str, IO[bytes]], file_name: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+    """파일 하나를 채점하여 (결과 데이터프레임, 채점 결과 엑셀 임시 파일 경로) 반환 (프로세스 풀 작업 단위)"""
+    if file_name is None and isinstance(file_or_path, str):
+        file_name = os.path.basename(file_or_path)
+
+    grader = ExcelGrader(file_or_path)
+    if not grader.load_workbook():
+        raise ValueError(f"파일 로드 실패: {file_name}" if file_name else "파일 로드 실패")
 
-        new_wb.save(output)
-        output.seek(0)
-        return output
+    try:
+        results_df = grader.analyze_answer_sheet()
+        return results_df, grader.generate_scored_excel()
+    finally:
+        grader.close()